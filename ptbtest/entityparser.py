@@ -20,10 +20,143 @@
 # along with this program.  If not, see [http://www.gnu.org/licenses/].
 """This module provides a helperclass to transform marked_up messages to plaintext with entities"""
 import re
+from collections import namedtuple
 
 from ptbtest.errors import BadMarkupException
 from telegram import MessageEntity
 
+_MARKDOWN_INVALIDS = re.compile(
+    r'''(\*_|\*```|\*`|\*\[.*?\]\(.*?\)|_\*|_```|_`|_\[.*?\]\(.*?\)|```\*|```_|
+                                  ```\[.*?\]\(.*?\)|`\*|`_|`\[.*?\]\(.*?\)|\[.*?\]\(.*?\)\*|
+                                  \[.*?\]\(.*?\)_|\[.*?\]\(.*?\)```|\[.*?\]\(.*?\)`)'''
+)
+_MARKDOWN_TAGS = re.compile(r'(([`]{3}|\*|_|`)(.*?)(\2))')
+_MARKDOWN_TEXT_LINKS = re.compile(r'(\[(?P<text>.*?)\]\((?P<url>.*?)\))')
+
+_HTML_INVALIDS = re.compile(r'''(<b><i>|<b><pre>|<b><code>|<b>(<a.*?>)|
+                                   <i><b>|<i><pre>|<i><code>|<i>(<a.*?>)|
+                                   <pre><b>|<pre><i>|<pre><code>|<pre>(<a.*?>)|
+                                   <code><b>|<code><i>|<code><pre>|<code>(<a.*?>)|
+                                   (<a.*>)?<b>|(<a.*?>)<i>|(<a.*?>)<pre>|(<a.*?>)<code>)'''
+                            )
+_HTML_TAG_NAMES = frozenset(['b', 'i', 'pre', 'code'])
+_HTML_TEXT_LINKS = re.compile(
+    r'<a href=[\'\"](?P<url>.*?)[\'\"]>(?P<text>.*?)<\/a>')
+
+# The entity type of every Markdown and HTML tag
+_TAG_TYPES = {
+    "*": "bold",
+    "b": "bold",
+    "_": "italic",
+    "i": "italic",
+    "`": "code",
+    "code": "code",
+    "```": "pre",
+    "pre": "pre"
+}
+
+
+def _markdown_tag(message, pos):
+    tag = _MARKDOWN_TAGS.search(message, pos)
+    if tag:
+        return tag.start(), tag.end(), tag.group(2), tag.start(3), tag.end(3)
+
+
+def _html_tag(message, pos):
+    """
+    Returns ``(start, end, tag, text_start, text_end)`` of the first ``<tag>text</tag>`` from
+    ``pos`` on, the same match as ``(<(b|i|pre|code)>(.*?)<\\/\\2>)`` but found with str.find
+    instead of the regex engine.
+    """
+    while True:
+        start = message.find('<', pos)
+        if start == -1:
+            return None
+        # no tag name is longer than 'code', so a '>' further on can't close this one
+        close = message.find('>', start + 1, start + len('<code>'))
+        if close != -1:
+            tag = message[start + 1:close]
+            if tag in _HTML_TAG_NAMES:
+                # like the regex' .*? the text may not span a newline, so the closing
+                # tag is only looked for up to the next one
+                newline = message.find('\n', close)
+                end = message.find('</' + tag + '>', close, newline
+                                   if newline != -1 else len(message))
+                if end != -1:
+                    return start, end + len(tag) + 3, tag, close + 1, end
+        pos = start + 1
+
+
+_MARKUP = {  # (invalids, tags, text_links) for every supported parse_mode
+    "Markdown": (_MARKDOWN_INVALIDS, _markdown_tag, _MARKDOWN_TEXT_LINKS),
+    "HTML": (_HTML_INVALIDS, _html_tag, _HTML_TEXT_LINKS)
+}
+
+# Every automatic entity needs one of these: @mention, #hashtag, /bot_command and
+# the dot in an url's domain.
+_SIGILS = frozenset('@#/.')
+# An url never spans whitespace, so only the words holding a dot need scanning.
+# The lookbehind makes a word without a dot fail once, not from every character.
+_DOTTED_WORDS = re.compile(r'(?<!\S)[^\s.]*\.\S*')
+_MENTIONS = re.compile(r'@[a-zA-Z0-9]{1,}\b')
+_HASHTAGS = re.compile(r'#[a-zA-Z0-9]{1,}\b')
+_BOT_COMMANDS = re.compile(r'(?<!\/|\w)\/[a-zA-Z0-0_\-]{1,}\b')
+# (sigil, entity type, pattern) of the entities that start with a sigil
+_SIGIL_ENTITIES = (('@', 'mention', _MENTIONS), ('#', 'hashtag', _HASHTAGS),
+                   ('/', 'bot_command', _BOT_COMMANDS))
+# Without a protocol an url can only start where a run of word characters does;
+# retrying from every later character of a long run made a failed search quadratic.
+_URL_BODY = r'([\w_-]+(?:(?:\.[\w_-]+)+))([\w.,@?^=%&:/~+#-]*[\w@?^=%&/~+#-])?'
+_URLS = re.compile(r'(?:(([hHtTpP]{4}[sS]?|[fFtTpP]{3})://)|(?<![\w-]))' +
+                   _URL_BODY)
+# Most texts have no '://' at all, the protocol branch can only fail for those.
+_URLS_NO_PROTOCOL = re.compile(r'(?<![\w-])' + _URL_BODY)
+
+# The url spans of recently scanned texts. Bots tend to see the same texts over and
+# over; the cache is simply emptied once it holds _URL_CACHE_SIZE of them.
+_URL_CACHE = {}
+_URL_CACHE_SIZE = 4096
+
+# Lightweight stand-in for telegram.MessageEntity while parsing. The entities are
+# only built once all offsets are final.
+_RawEntity = namedtuple('_RawEntity', 'type offset length url')
+
+# On Python 2 a plain str is bytes: it has no UTF-16 length and its entity offsets stay
+# byte offsets, as they always were.
+_TEXT_TYPE = type(u'')
+
+
+def _utf16_length(text):
+    """The length of ``text`` in UTF-16 code units, which is what Telegram counts in."""
+    return len(text.encode('utf-16-le')) // 2
+
+
+def _message_entities(message, entities):
+    # Entities come out in text order, an enclosing entity before the ones nested
+    # in it. The sort is stable, so markup still wins ties over automatic entities.
+    entities.sort(key=lambda ent: (ent.offset, -ent.length))
+    if (not isinstance(message, _TEXT_TYPE) or
+            _utf16_length(message) == len(message)):
+        return [
+            MessageEntity(
+                ent.type, ent.offset, ent.length, url=ent.url)
+            for ent in entities
+        ]
+    # Characters outside the BMP take two code units. The entities are sorted, so
+    # each offset only needs the text since the previous one encoded.
+    result = []
+    offset = utf16_offset = 0
+    for ent in entities:
+        utf16_offset += _utf16_length(message[offset:ent.offset])
+        offset = ent.offset
+        result.append(
+            MessageEntity(
+                ent.type,
+                utf16_offset,
+                _utf16_length(message[offset:offset + ent.length]),
+                url=ent.url))
+    return result
+
 
 class EntityParser():
     """
@@ -44,16 +177,7 @@ class EntityParser():
             (message(str), entities(list(telegram.MessageEntity))): The entities found in the message and
             the message after parsing.
         """
-        invalids = re.compile(
-            r'''(\*_|\*```|\*`|\*\[.*?\]\(.*?\)|_\*|_```|_`|_\[.*?\]\(.*?\)|```\*|```_|
-                                  ```\[.*?\]\(.*?\)|`\*|`_|`\[.*?\]\(.*?\)|\[.*?\]\(.*?\)\*|
-                                  \[.*?\]\(.*?\)_|\[.*?\]\(.*?\)```|\[.*?\]\(.*?\)`)'''
-        )
-        tags = re.compile(r'(([`]{3}|\*|_|`)(.*?)(\2))')
-        text_links = re.compile(r'(\[(?P<text>.*?)\]\((?P<url>.*?)\))')
-
-        return EntityParser.__parse_text("Markdown", message, invalids, tags,
-                                         text_links)
+        return EntityParser.parse_text(message, "Markdown")
 
     @staticmethod
     def parse_html(message):
@@ -66,74 +190,170 @@ class EntityParser():
             (message(str), entities(list(telegram.MessageEntity))): The entities found in the message and
             the message after parsing.
         """
-        invalids = re.compile(r'''(<b><i>|<b><pre>|<b><code>|<b>(<a.*?>)|
-                                   <i><b>|<i><pre>|<i><code>|<i>(<a.*?>)|
-                                   <pre><b>|<pre><i>|<pre><code>|<pre>(<a.*?>)|
-                                   <code><b>|<code><i>|<code><pre>|<code>(<a.*?>)|
-                                   (<a.*>)?<b>|(<a.*?>)<i>|(<a.*?>)<pre>|(<a.*?>)<code>)'''
-                              )
-        tags = re.compile(r'(<(b|i|pre|code)>(.*?)<\/\2>)')
-        text_links = re.compile(
-            r'<a href=[\'\"](?P<url>.*?)[\'\"]>(?P<text>.*?)<\/a>')
+        return EntityParser.parse_text(message, "HTML")
+
+    @staticmethod
+    def parse_urls(message):
+        """
+        Finds the urls in a plain text message, without looking at any markup.
+
+        Args:
+            message (str): The text to search
 
-        return EntityParser.__parse_text("HTML", message, invalids, tags,
+        Returns:
+            list(telegram.MessageEntity): An entity of type url for every url found.
+        """
+        return _message_entities(message, [
+            _RawEntity('url', start, end - start, None)
+            for start, end in EntityParser._scan_urls(message)
+        ])
+
+    @staticmethod
+    def parse_text(message, parse_mode):
+        """
+
+        Args:
+            message (str): Message with marked up text to be transformed
+            parse_mode (str): "HTML" or "Markdown"
+
+        Returns:
+            (message(str), entities(list(telegram.MessageEntity))): The entities found in the message and
+            the message after parsing.
+        """
+        if parse_mode not in _MARKUP:
+            raise BadMarkupException('Mardown mode must be HTML or Markdown')
+        invalids, tags, text_links = _MARKUP[parse_mode]
+        return EntityParser.__parse_text(parse_mode, message, invalids, tags,
                                          text_links)
 
     @staticmethod
     def __parse_text(ptype, message, invalids, tags, text_links):
         entities = []
-        mentions = re.compile(r'@[a-zA-Z0-9]{1,}\b')
-        hashtags = re.compile(r'#[a-zA-Z0-9]{1,}\b')
-        botcommands = re.compile(r'(?<!\/|\w)\/[a-zA-Z0-0_\-]{1,}\b')
-        urls = re.compile(
-            r'(([hHtTpP]{4}[sS]?|[fFtTpP]{3})://)?([\w_-]+(?:(?:\.[\w_-]+)+))([\w.,@?^=%&:/~+#-]*[\w@?^=%&/~+#-])?'
-        )
         inv = invalids.search(message)
         if inv:
             raise BadMarkupException(
                 "nested {} is not supported. your text: {}".format(
                     ptype, inv.groups()[0]))
-        while tags.search(message):
-            tag = tags.search(message)
-            text = tag.groups()[2]
-            start = tag.start()
-            if tag.groups()[1] in ["b", "*"]:
-                parse_type = "bold"
-            elif tag.groups()[1] in ["i", "_"]:
-                parse_type = "italic"
-            elif tag.groups()[1] in ["code", "`"]:
-                parse_type = "code"
-            elif tag.groups()[1] in ["pre", "```"]:
-                parse_type = "pre"
-            entities.append(MessageEntity(parse_type, start, len(text)))
-            message = tags.sub(r'\3', message, count=1)
-        while text_links.search(message):
-            link = text_links.search(message)
-            url = link.group('url')
-            text = link.group('text')
+        # Markup is stripped one match at a time. The next search starts where the
+        # stripped text does, so markup nested in it (``_a *b* c_``) is stripped too
+        # and the entities still reaching past it are moved along with it.
+        reaching = []
+        pos = 0
+        while True:
+            tag = tags(message, pos)
+            if tag is None:
+                break
+            start, end, name, text_start, text_end = tag
+            length = text_end - text_start
+            reaching = EntityParser._strip_entities(entities, reaching, start,
+                                                    text_start - start, length,
+                                                    end - start - length)
+            reaching.append(len(entities))
+            entities.append(_RawEntity(_TAG_TYPES[name], start, length, None))
+            message = message[:start] + message[text_start:text_end] + message[
+                end:]
+            pos = start
+        reaching = list(range(len(entities)))
+        pos = 0
+        while True:
+            link = text_links.search(message, pos)
+            if link is None:
+                break
             start = link.start()
+            text = link.group('text')
             length = len(text)
-            for x, ent in enumerate(entities):
-                if ent.offset > start:
-                    entities[x].offset -= link.end() - start - length
-            entities.append(MessageEntity('text_link', start, length, url=url))
-            message = text_links.sub(r'\g<text>', message, count=1)
-        for mention in mentions.finditer(message):
-            entities.append(
-                MessageEntity('mention',
-                              mention.start(), mention.end() - mention.start(
-                              )))
-        for hashtag in hashtags.finditer(message):
+            reaching = EntityParser._strip_entities(entities, reaching, start,
+                                                    link.start('text') - start,
+                                                    length,
+                                                    len(link.group()) - length)
+            reaching.append(len(entities))
             entities.append(
-                MessageEntity('hashtag',
-                              hashtag.start(), hashtag.end() - hashtag.start(
-                              )))
-        for botcommand in botcommands.finditer(message):
-            entities.append(
-                MessageEntity('bot_command',
-                              botcommand.start(),
-                              botcommand.end() - botcommand.start()))
-        for url in urls.finditer(message):
-            entities.append(
-                MessageEntity('url', url.start(), url.end() - url.start()))
-        return message, entities
+                _RawEntity('text_link', start, length, link.group('url')))
+            message = message[:start] + text + message[link.end():]
+            pos = start
+        sigils = _SIGILS.intersection(message)
+        if not sigils:
+            return message, _message_entities(message, entities)
+        for sigil, entity_type, pattern in _SIGIL_ENTITIES:
+            if sigil in sigils:
+                for match in pattern.finditer(message):
+                    entities.append(
+                        _RawEntity(entity_type,
+                                   match.start(),
+                                   match.end() - match.start(), None))
+        if '.' in sigils:
+            for start, end in EntityParser._scan_urls(message):
+                entities.append(_RawEntity('url', start, end - start, None))
+        return message, _message_entities(message, entities)
+
+    @staticmethod
+    def _scan_urls(message):
+        """
+        Finds the urls in ``message``.
+
+        Returns:
+            tuple((start(int), end(int))): The spans of the urls found
+        """
+        # every url has a dot in its domain; dotless texts need neither scan nor cache
+        if '.' not in message:
+            return ()
+        spans = _URL_CACHE.get(message)
+        if spans is not None:
+            return spans
+        urls = _URLS if '://' in message else _URLS_NO_PROTOCOL
+        spans = []
+        for word in _DOTTED_WORDS.finditer(message):
+            start, end = word.span()
+            for url in urls.finditer(message, start, end):
+                spans.append(url.span())
+        spans = tuple(spans)
+        if len(_URL_CACHE) >= _URL_CACHE_SIZE:
+            _URL_CACHE.clear()
+        _URL_CACHE[message] = spans
+        return spans
+
+    @staticmethod
+    def clear_url_cache():
+        """
+        Forgets the urls remembered for previously parsed texts.
+        """
+        _URL_CACHE.clear()
+
+    @staticmethod
+    def _strip_entities(entities, indexes, offset, prefix, length, removed):
+        """
+        Moves the entities at ``indexes`` to where they end up once the markup at ``offset``
+        is stripped, see :meth:`_strip_position`. Entities ending before the markup stay
+        where they are.
+
+        Returns:
+            list(int): The indexes of the entities that were moved. Markup is stripped from
+            left to right, so the others never have to be looked at again.
+        """
+        moved = []
+        for x in indexes:
+            ent = entities[x]
+            end = ent.offset + ent.length
+            if end <= offset:
+                continue
+            # an entity may enclose the markup, so both its ends are moved
+            start = EntityParser._strip_position(ent.offset, offset, prefix,
+                                                 length, removed)
+            end = EntityParser._strip_position(end, offset, prefix, length,
+                                               removed)
+            entities[x] = ent._replace(offset=start, length=end - start)
+            moved.append(x)
+        return moved
+
+    @staticmethod
+    def _strip_position(pos, offset, prefix, length, removed):
+        """
+        Moves ``pos`` to where it ends up once the markup at ``offset`` is replaced by the
+        ``length`` characters of its text, which start ``prefix`` characters into the
+        markup. Positions inside the markup itself are clamped to that text.
+        """
+        if pos <= offset:
+            return pos
+        if pos >= offset + length + removed:
+            return pos - removed
+        return offset + min(max(pos - offset - prefix, 0), length)
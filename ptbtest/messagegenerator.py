@@ -27,8 +27,7 @@ from .ptbgenerator import PtbGenerator
 from .entityparser import EntityParser
 from ptbtest import (UserGenerator, ChatGenerator, Mockbot)
 from ptbtest.errors import (BadUserException, BadMessageException,
-                            BadChatException, BadBotException,
-                            BadMarkupException)
+                            BadChatException, BadBotException)
 from telegram import (Audio, Chat, Contact, Document, Location, Message,
                       PhotoSize, Sticker, User, Venue, Video, Voice)
 
@@ -494,13 +493,7 @@ class MessageGenerator(PtbGenerator):
 
     def _handle_text(self, text, parse_mode):
         if text and parse_mode:
-            if parse_mode not in ["HTML", "Markdown"]:
-                raise BadMarkupException(
-                    'Mardown mode must be HTML or Markdown')
-            elif parse_mode == "HTML":
-                text, entities = EntityParser.parse_html(text)
-            else:
-                text, entities = EntityParser.parse_markdown(text)
+            text, entities = EntityParser.parse_text(text, parse_mode)
         else:
             entities = []
         return text, entities
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# pylint: disable=E0611,E0213,E1102,C0103,E1101,W0613,R0913,R0904
+#
+# A library that provides a testing suite fot python-telegram-bot
+# wich can be found on https://github.com/python-telegram-bot/python-telegram-bot
+# Copyright (C) 2017
+# Pieter Schutz - https://github.com/eldinnie
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser Public License for more details.
+#
+# You should have received a copy of the GNU Lesser Public License
+# along with this program.  If not, see [http://www.gnu.org/licenses/].
+from __future__ import absolute_import
+import unittest
+
+from ptbtest.entityparser import EntityParser
+from telegram import MessageEntity
+
+URL = MessageEntity.URL
+MENTION = MessageEntity.MENTION
+HASHTAG = MessageEntity.HASHTAG
+BOT_COMMAND = MessageEntity.BOT_COMMAND
+
+
+def U(offset, length):
+    return (URL, offset, length)
+
+
+def spans(entities):
+    """The entities as (type, offset, length) tuples, MessageEntity has no __eq__ of its own."""
+    return [(ent.type, ent.offset, ent.length) for ent in entities]
+
+
+URL_CASES = [  # (text, [expected url, ...])
+    ("telegram.org", [U(0, 12)]),
+    ("see www.google.com now", [U(4, 14)]),
+    ("ftp://snt.utwente.nl", [U(0, 20)]),
+    ("http://x.y/path?a=1&b=2.", [U(0, 23)]),
+    ("https://t.me/joinchat/abc,", [U(0, 25)]),
+    ("example.com/foo/bar/", [U(0, 20)]),
+    ("end with dot x.com.", [U(13, 5)]),
+    ("a.b.c d.e", [U(0, 5), U(6, 3)]),
+    (u"\U0001F600 t.me", [U(3, 4)]),
+]
+
+NO_URL_CASES = ["", "no url here", "x..y", ".com", "@username #hashtag /start"]
+
+# stray '<' and tags without a closing one on their line
+LONG_MARKUP = ["<" * 80000 + ">", "a < b " * 13000 + ">", "<b>a\n" * 32000]
+
+
+class TestParseUrls(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # EntityParser only has static methods, so one instance serves every test
+        cls.ep = EntityParser()
+
+    def test_urls(self):
+        for text, expected in URL_CASES:
+            self.assertEqual(spans(self.ep.parse_urls(text)), expected, text)
+
+    def test_no_urls(self):
+        for text in NO_URL_CASES:
+            self.assertEqual(self.ep.parse_urls(text), [], text)
+
+    def test_repeated_text(self):
+        self.ep.clear_url_cache()
+        first = self.ep.parse_urls("go to telegram.org")
+        second = self.ep.parse_urls("go to telegram.org")
+        self.assertIsNot(first[0], second[0])
+        self.assertEqual(spans(second), [U(6, 12)])
+
+    def test_long_words(self):
+        # linear scans take milliseconds here, a backtracking pattern would hang
+        self.assertEqual(self.ep.parse_urls("a" * 50000 + "."), [])
+        self.assertEqual(self.ep.parse_urls("a-" * 25000 + "."), [])
+        url = "http://x.y/" + "a," * 25000 + "b"
+        self.assertEqual(spans(self.ep.parse_urls(url)), [U(0, len(url))])
+
+
+class TestParseText(unittest.TestCase):
+    def test_long_markup(self):
+        # a '<' is only followed a tag name's length on, a tag only up to its line end
+        for text in LONG_MARKUP:
+            self.assertEqual(EntityParser.parse_html(text), (text, []))
+
+    def test_non_ascii(self):
+        text, entities = EntityParser.parse_markdown(
+            u"\u043f\u0440\u0438 @user #tag /start x.ru")
+        self.assertEqual(
+            spans(entities), [(MENTION, 4, 5), (HASHTAG, 10, 4),
+                              (BOT_COMMAND, 15, 6), U(22, 4)])
+
+    def test_byte_string(self):
+        # a byte str on Python 2, where non-ASCII bytes can't be measured in UTF-16
+        text, entities = EntityParser.parse_markdown(
+            "caf\xc3\xa9 *bold* @user x.com")
+        self.assertEqual(text, "caf\xc3\xa9 bold @user x.com")
+        self.assertEqual(
+            spans(entities), [("bold", 6, 4), (MENTION, 11, 5), U(17, 5)])
+
+
+if __name__ == '__main__':
+    unittest.main()
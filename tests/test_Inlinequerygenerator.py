@@ -33,8 +33,9 @@ from telegram import User
 
 
 class TestInlineQueryGenerator(unittest.TestCase):
-    def setUp(self):
-        self.iqg = InlineQueryGenerator()
+    @classmethod
+    def setUpClass(cls):
+        cls.iqg = InlineQueryGenerator()
 
     def test_standard(self):
         u = self.iqg.get_inline_query()
@@ -85,8 +86,9 @@ class TestInlineQueryGenerator(unittest.TestCase):
 
 
 class TestChosenInlineResult(unittest.TestCase):
-    def setUp(self):
-        self.iqc = InlineQueryGenerator()
+    @classmethod
+    def setUpClass(cls):
+        cls.iqc = InlineQueryGenerator()
 
     def test_chosen_inline_result(self):
         u = self.iqc.get_chosen_inline_result("testid")
@@ -9,10 +9,61 @@ from ptbtest import (UserGenerator, MessageGenerator, ChatGenerator)
 from telegram import (Audio, Contact, Document, Location, Sticker, User,
                       Update, Venue, Video, Voice, PhotoSize, Message)
 
+# Only TestMessageGeneratorCore checks the bot a MessageGenerator makes for itself,
+# all other tests share this one.
+BOT = Mockbot()
+
+MARKDOWN_TEXT = (
+    "we have *bold* `code` [google](www.google.com) @username "
+    "#hashtag _italics_ ```pre block``` ftp://snt.utwente.nl /start")
+HTML_TEXT = ("we have <b>bold</b> <code>code</code> "
+             "<a href='www.google.com'>google</a> @username #hashtag "
+             "<i>italics</i> <pre>pre block</pre> ftp://snt.utwente.nl /start")
+
+# type: (offset, length, url) of every entity in MARKDOWN_TEXT and HTML_TEXT
+EXPECTED_ENTITIES = {
+    "bold": (8, 4, None),
+    "code": (13, 4, None),
+    "text_link": (18, 6, "www.google.com"),
+    "mention": (25, 9, None),
+    "hashtag": (35, 8, None),
+    "italic": (44, 7, None),
+    "pre": (52, 9, None),
+    "url": (62, 20, None),
+    "bot_command": (83, 6, None)
+}
+
+# (MessageGenerator method, Update attribute) of every kind of message update
+MESSAGE_KINDS = [
+    ("get_message", "message"),
+    ("get_edited_message", "edited_message"),
+    ("get_channel_post", "channel_post"),
+    ("get_edited_channel_post", "edited_channel_post"),
+]
+
+# Sample attachments, built once; get_message only reads them.
+LOCATION = Location(50.012, -32.11)
+VENUE = Venue(Location(1.0, 1.0), "some place", "somewhere")
+CONTACT = Contact("0612345", "testman")
+PHOTO = [PhotoSize("2", 1, 1, file_size=3)]
+
+# (get_message keyword, sample, expected type, error pattern) of the file attachments
+FILE_ATTACHMENTS = [
+    ("voice", Voice("idyouknow", 12), Voice, r"telegram\.Voice"),
+    ("video", Video("idyouknow", 200, 200, 10), Video, r"telegram\.Video"),
+    ("sticker", Sticker("idyouknow", 30, 30), Sticker, r"telegram\.Sticker"),
+    ("document", Document(
+        "idyouknow", file_name="test.pdf"), Document, r"telegram\.Document"),
+    ("audio", Audio("idyouknow", 23), Audio, r"telegram\.Audio"),
+]
+
 
 class TestMessageGeneratorCore(unittest.TestCase):
-    def setUp(self):
-        self.mg = MessageGenerator()
+    @classmethod
+    def setUpClass(cls):
+        cls.mg = MessageGenerator()
+        cls.ug = UserGenerator()
+        cls.cg = ChatGenerator()
 
     def test_is_update(self):
         u = self.mg.get_message()
@@ -29,8 +80,7 @@ class TestMessageGeneratorCore(unittest.TestCase):
         u = mg2.get_message()
         self.assertEqual(u.message.bot.username, "AnotherBot")
 
-        with self.assertRaises(BadBotException):
-            mg3 = MessageGenerator(bot="Yeah!")
+        self.assertRaises(BadBotException, MessageGenerator, bot="Yeah!")
 
     def test_private_message(self):
         u = self.mg.get_message(private=True)
@@ -42,8 +92,7 @@ class TestMessageGeneratorCore(unittest.TestCase):
         self.assertNotEqual(u.message.from_user.id, u.message.chat.id)
 
     def test_with_user(self):
-        ug = UserGenerator()
-        us = ug.get_user()
+        us = self.ug.get_user()
         u = self.mg.get_message(user=us, private=False)
         self.assertEqual(u.message.from_user.id, us.id)
         self.assertNotEqual(u.message.from_user.id, u.message.chat.id)
@@ -57,19 +106,18 @@ class TestMessageGeneratorCore(unittest.TestCase):
             u = self.mg.get_message(user=us)
 
     def test_with_chat(self):
-        cg = ChatGenerator()
-        c = cg.get_chat()
+        c = self.cg.get_chat()
         u = self.mg.get_message(chat=c)
         self.assertEqual(u.message.chat.id, u.message.from_user.id)
         self.assertEqual(u.message.chat.id, c.id)
 
-        c = cg.get_chat(type="group")
+        c = self.cg.get_chat(type="group")
         u = self.mg.get_message(chat=c)
         self.assertNotEqual(u.message.from_user.id, u.message.chat.id)
         self.assertEqual(u.message.chat.id, c.id)
 
         with self.assertRaisesRegexp(BadChatException, "get_channel_post"):
-            c = cg.get_chat(type="channel")
+            c = self.cg.get_chat(type="channel")
             self.mg.get_message(chat=c)
 
         with self.assertRaises(BadChatException):
@@ -77,128 +125,117 @@ class TestMessageGeneratorCore(unittest.TestCase):
             self.mg.get_message(chat=c)
 
     def test_with_chat_and_user(self):
-        cg = ChatGenerator()
-        ug = UserGenerator()
-        us = ug.get_user()
-        c = cg.get_chat()
+        us = self.ug.get_user()
+        c = self.cg.get_chat()
         u = self.mg.get_message(user=us, chat=c)
         self.assertNotEqual(u.message.from_user.id, u.message.chat.id)
         self.assertEqual(u.message.from_user.id, us.id)
         self.assertEqual(u.message.chat.id, c.id)
 
         us = "not a telegram.User"
-        with self.assertRaises(BadUserException):
-            u = self.mg.get_message(user=us)
-        with self.assertRaises(BadUserException):
-            u = self.mg.get_message(chat=c, user="user")
+        self.assertRaises(BadUserException, self.mg.get_message, user=us)
+        self.assertRaises(
+            BadUserException, self.mg.get_message, chat=c, user="user")
 
         c = "Not a telegram.Chat"
-        with self.assertRaises(BadChatException):
-            self.mg.get_message(chat=c)
-        with self.assertRaises(BadChatException):
-            self.mg.get_message(user=u, chat="chat")
+        self.assertRaises(BadChatException, self.mg.get_message, chat=c)
+        self.assertRaises(
+            BadChatException, self.mg.get_message, user=u, chat="chat")
 
 
 class TestMessageGeneratorText(unittest.TestCase):
-    def setUp(self):
-        self.mg = MessageGenerator()
+    @classmethod
+    def setUpClass(cls):
+        cls.mg = MessageGenerator(bot=BOT)
 
     def test_simple_text(self):
         u = self.mg.get_message(text="This is a test")
         self.assertEqual(u.message.text, "This is a test")
 
     def test_text_with_markdown(self):
-        teststr = "we have *bold* `code` [google](www.google.com) @username #hashtag _italics_ ```pre block``` " \
-                  "ftp://snt.utwente.nl /start"
-        u = self.mg.get_message(text=teststr)
-        self.assertEqual(u.message.text, teststr)
+        u = self.mg.get_message(text=MARKDOWN_TEXT)
+        self.assertEqual(u.message.text, MARKDOWN_TEXT)
 
-        u = self.mg.get_message(text=teststr, parse_mode="Markdown")
-        self.assertEqual(len(u.message.entities), 9)
+        u = self.mg.get_message(text=MARKDOWN_TEXT, parse_mode="Markdown")
+        self.assertEqual(len(u.message.entities), len(EXPECTED_ENTITIES))
         for ent in u.message.entities:
-            if ent.type == "bold":
-                self.assertEqual(ent.offset, 8)
-                self.assertEqual(ent.length, 4)
-            elif ent.type == "code":
-                self.assertEqual(ent.offset, 13)
-                self.assertEqual(ent.length, 4)
-            elif ent.type == "italic":
-                self.assertEqual(ent.offset, 44)
-                self.assertEqual(ent.length, 7)
-            elif ent.type == "pre":
-                self.assertEqual(ent.offset, 52)
-                self.assertEqual(ent.length, 9)
-            elif ent.type == "text_link":
-                self.assertEqual(ent.offset, 18)
-                self.assertEqual(ent.length, 6)
-                self.assertEqual(ent.url, "www.google.com")
-            elif ent.type == "mention":
-                self.assertEqual(ent.offset, 25)
-                self.assertEqual(ent.length, 9)
-            elif ent.type == "hashtag":
-                self.assertEqual(ent.offset, 35)
-                self.assertEqual(ent.length, 8)
-            elif ent.type == "url":
-                self.assertEqual(ent.offset, 62)
-                self.assertEqual(ent.length, 20)
-            elif ent.type == "bot_command":
-                self.assertEqual(ent.offset, 83)
-                self.assertEqual(ent.length, 6)
-
-        with self.assertRaises(BadMarkupException):
-            self.mg.get_message(
-                text="bad *_double_* markdown", parse_mode="Markdown")
+            self.assertEqual((ent.offset, ent.length, ent.url),
+                             EXPECTED_ENTITIES[ent.type], ent.type)
+
+        self.assertRaises(
+            BadMarkupException,
+            self.mg.get_message,
+            text="bad *_double_* markdown",
+            parse_mode="Markdown")
 
     def test_with_html(self):
-        teststr = "we have <b>bold</b> <code>code</code> <a href='www.google.com'>google</a> @username #hashtag " \
-                  "<i>italics</i> <pre>pre block</pre> ftp://snt.utwente.nl /start"
-        u = self.mg.get_message(text=teststr)
-        self.assertEqual(u.message.text, teststr)
+        u = self.mg.get_message(text=HTML_TEXT)
+        self.assertEqual(u.message.text, HTML_TEXT)
 
-        u = self.mg.get_message(text=teststr, parse_mode="HTML")
-        self.assertEqual(len(u.message.entities), 9)
+        u = self.mg.get_message(text=HTML_TEXT, parse_mode="HTML")
+        self.assertEqual(len(u.message.entities), len(EXPECTED_ENTITIES))
         for ent in u.message.entities:
-            if ent.type == "bold":
-                self.assertEqual(ent.offset, 8)
-                self.assertEqual(ent.length, 4)
-            elif ent.type == "code":
-                self.assertEqual(ent.offset, 13)
-                self.assertEqual(ent.length, 4)
-            elif ent.type == "italic":
-                self.assertEqual(ent.offset, 44)
-                self.assertEqual(ent.length, 7)
-            elif ent.type == "pre":
-                self.assertEqual(ent.offset, 52)
-                self.assertEqual(ent.length, 9)
-            elif ent.type == "text_link":
-                self.assertEqual(ent.offset, 18)
-                self.assertEqual(ent.length, 6)
-                self.assertEqual(ent.url, "www.google.com")
-            elif ent.type == "mention":
-                self.assertEqual(ent.offset, 25)
-                self.assertEqual(ent.length, 9)
-            elif ent.type == "hashtag":
-                self.assertEqual(ent.offset, 35)
-                self.assertEqual(ent.length, 8)
-            elif ent.type == "url":
-                self.assertEqual(ent.offset, 62)
-                self.assertEqual(ent.length, 20)
-            elif ent.type == "bot_command":
-                self.assertEqual(ent.offset, 83)
-                self.assertEqual(ent.length, 6)
-
-        with self.assertRaises(BadMarkupException):
-            self.mg.get_message(
-                text="bad <b><i>double</i></b> markup", parse_mode="HTML")
+            self.assertEqual((ent.offset, ent.length, ent.url),
+                             EXPECTED_ENTITIES[ent.type], ent.type)
+
+        self.assertRaises(
+            BadMarkupException,
+            self.mg.get_message,
+            text="bad <b><i>double</i></b> markup",
+            parse_mode="HTML")
+
+    def test_markup_inside_entity(self):
+        u = self.mg.get_message(text="_a *b* c_", parse_mode="Markdown")
+        self.assertEqual(u.message.text, "a b c")
+        self.assertEqual([(ent.type, ent.offset, ent.length)
+                          for ent in u.message.entities],
+                         [("italic", 0, 5), ("bold", 2, 1)])
+        u = self.mg.get_message(
+            text="z<i>9919<b> 0y</b></i>", parse_mode="HTML")
+        self.assertEqual(u.message.text, "z9919 0y")
+        self.assertEqual([(ent.type, ent.offset, ent.length)
+                          for ent in u.message.entities],
+                         [("italic", 1, 7), ("bold", 5, 3)])
+
+    def test_entity_order(self):
+        u = self.mg.get_message(
+            text="/start *hi @username* _x_", parse_mode="Markdown")
+        self.assertEqual([(ent.type, ent.offset, ent.length)
+                          for ent in u.message.entities],
+                         [("bot_command", 0, 6), ("bold", 7, 12),
+                          ("mention", 10, 9), ("italic", 20, 1)])
+
+    def test_link_inside_entity(self):
+        u = self.mg.get_message(
+            text="*see [this](x.y) now* _ok_", parse_mode="Markdown")
+        self.assertEqual(u.message.text, "see this now ok")
+        self.assertEqual([(ent.type, ent.offset, ent.length)
+                          for ent in u.message.entities],
+                         [("bold", 0, 12), ("text_link", 4, 4),
+                          ("italic", 13, 2)])
+
+    def test_utf16_offsets(self):
+        u = self.mg.get_message(
+            text=u"\U0001F600 *bold* @username", parse_mode="Markdown")
+        self.assertEqual([(ent.type, ent.offset, ent.length)
+                          for ent in u.message.entities],
+                         [("bold", 3, 4), ("mention", 8, 9)])
+        self.assertEqual(
+            sorted(u.message.parse_entities().values()),
+            ["@username", "bold"])
 
     def test_wrong_markup(self):
-        with self.assertRaises(BadMarkupException):
-            self.mg.get_message(text="text", parse_mode="htmarkdownl")
+        self.assertRaises(
+            BadMarkupException,
+            self.mg.get_message,
+            text="text",
+            parse_mode="htmarkdownl")
 
 
 class TestMessageGeneratorReplies(unittest.TestCase):
-    def setUp(self):
-        self.mg = MessageGenerator()
+    @classmethod
+    def setUpClass(cls):
+        cls.mg = MessageGenerator(bot=BOT)
 
     def test_reply(self):
         u1 = self.mg.get_message(text="this is the first")
@@ -212,10 +249,11 @@ class TestMessageGeneratorReplies(unittest.TestCase):
 
 
 class TestMessageGeneratorForwards(unittest.TestCase):
-    def setUp(self):
-        self.mg = MessageGenerator()
-        self.ug = UserGenerator()
-        self.cg = ChatGenerator()
+    @classmethod
+    def setUpClass(cls):
+        cls.mg = MessageGenerator(bot=BOT)
+        cls.ug = UserGenerator()
+        cls.cg = ChatGenerator()
 
     def test_forwarded_message(self):
         u1 = self.ug.get_user()
@@ -265,10 +303,11 @@ class TestMessageGeneratorForwards(unittest.TestCase):
 
 
 class TestMessageGeneratorStatusMessages(unittest.TestCase):
-    def setUp(self):
-        self.mg = MessageGenerator()
-        self.ug = UserGenerator()
-        self.cg = ChatGenerator()
+    @classmethod
+    def setUpClass(cls):
+        cls.mg = MessageGenerator(bot=BOT)
+        cls.ug = UserGenerator()
+        cls.cg = ChatGenerator()
 
     def test_new_chat_member(self):
         user = self.ug.get_user()
@@ -276,10 +315,13 @@ class TestMessageGeneratorStatusMessages(unittest.TestCase):
         u = self.mg.get_message(chat=chat, new_chat_member=user)
         self.assertEqual(u.message.new_chat_member.id, user.id)
 
-        with self.assertRaises(BadChatException):
-            self.mg.get_message(new_chat_member=user)
-        with self.assertRaises(BadUserException):
-            self.mg.get_message(chat=chat, new_chat_member="user")
+        self.assertRaises(
+            BadChatException, self.mg.get_message, new_chat_member=user)
+        self.assertRaises(
+            BadUserException,
+            self.mg.get_message,
+            chat=chat,
+            new_chat_member="user")
 
     def test_left_chat_member(self):
         user = self.ug.get_user()
@@ -287,10 +329,13 @@ class TestMessageGeneratorStatusMessages(unittest.TestCase):
         u = self.mg.get_message(chat=chat, left_chat_member=user)
         self.assertEqual(u.message.left_chat_member.id, user.id)
 
-        with self.assertRaises(BadChatException):
-            self.mg.get_message(left_chat_member=user)
-        with self.assertRaises(BadUserException):
-            self.mg.get_message(chat=chat, left_chat_member="user")
+        self.assertRaises(
+            BadChatException, self.mg.get_message, left_chat_member=user)
+        self.assertRaises(
+            BadUserException,
+            self.mg.get_message,
+            chat=chat,
+            left_chat_member="user")
 
     def test_new_chat_title(self):
         chat = self.cg.get_chat(type="group")
@@ -298,26 +343,31 @@ class TestMessageGeneratorStatusMessages(unittest.TestCase):
         self.assertEqual(u.message.chat.title, "New title")
         self.assertEqual(u.message.chat.title, chat.title)
 
-        with self.assertRaises(BadChatException):
-            self.mg.get_message(new_chat_title="New title")
+        self.assertRaises(
+            BadChatException, self.mg.get_message, new_chat_title="New title")
 
     def test_new_chat_photo(self):
         chat = self.cg.get_chat(type="group")
         u = self.mg.get_message(chat=chat, new_chat_photo=True)
         self.assertIsInstance(u.message.new_chat_photo, list)
         self.assertIsInstance(u.message.new_chat_photo[0], PhotoSize)
-        photo = [PhotoSize("2", 1, 1, file_size=3)]
-        u = self.mg.get_message(chat=chat, new_chat_photo=photo)
+        u = self.mg.get_message(chat=chat, new_chat_photo=PHOTO)
         self.assertEqual(len(u.message.new_chat_photo), 1)
 
-        with self.assertRaises(BadChatException):
-            self.mg.get_message(new_chat_photo=True)
+        self.assertRaises(
+            BadChatException, self.mg.get_message, new_chat_photo=True)
 
         photo = "foto's!"
-        with self.assertRaises(BadMessageException):
-            self.mg.get_message(chat=chat, new_chat_photo=photo)
-        with self.assertRaises(BadMessageException):
-            self.mg.get_message(chat=chat, new_chat_photo=[1, 2, 3])
+        self.assertRaises(
+            BadMessageException,
+            self.mg.get_message,
+            chat=chat,
+            new_chat_photo=photo)
+        self.assertRaises(
+            BadMessageException,
+            self.mg.get_message,
+            chat=chat,
+            new_chat_photo=[1, 2, 3])
 
     def test_pinned_message(self):
         chat = self.cg.get_chat(type="supergroup")
@@ -326,176 +376,145 @@ class TestMessageGeneratorStatusMessages(unittest.TestCase):
         u = self.mg.get_message(chat=chat, pinned_message=message)
         self.assertEqual(u.message.pinned_message.text, "this will be pinned")
 
-        with self.assertRaises(BadChatException):
-            self.mg.get_message(pinned_message=message)
-        with self.assertRaises(BadMessageException):
-            self.mg.get_message(chat=chat, pinned_message="message")
+        self.assertRaises(
+            BadChatException, self.mg.get_message, pinned_message=message)
+        self.assertRaises(
+            BadMessageException,
+            self.mg.get_message,
+            chat=chat,
+            pinned_message="message")
 
     def test_multiple_statusmessages(self):
-        with self.assertRaises(BadMessageException):
-            self.mg.get_message(
-                private=False,
-                new_chat_member=self.ug.get_user(),
-                new_chat_title="New title")
+        self.assertRaises(
+            BadMessageException,
+            self.mg.get_message,
+            private=False,
+            new_chat_member=self.ug.get_user(),
+            new_chat_title="New title")
 
 
 class TestMessageGeneratorAttachments(unittest.TestCase):
-    def setUp(self):
-        self.mg = MessageGenerator()
+    @classmethod
+    def setUpClass(cls):
+        cls.mg = MessageGenerator(bot=BOT)
 
     def test_caption_solo(self):
-        with self.assertRaisesRegexp(BadMessageException, r"caption without"):
-            self.mg.get_message(caption="my cap")
+        self.assertRaisesRegexp(
+            BadMessageException,
+            r"caption without",
+            self.mg.get_message,
+            caption="my cap")
 
     def test_more_than_one(self):
-        with self.assertRaisesRegexp(BadMessageException, "more than one"):
-            self.mg.get_message(photo=True, video=True)
+        self.assertRaisesRegexp(
+            BadMessageException,
+            "more than one",
+            self.mg.get_message,
+            photo=True,
+            video=True)
 
     def test_location(self):
-        loc = Location(50.012, -32.11)
-        u = self.mg.get_message(location=loc)
-        self.assertEqual(loc.longitude, u.message.location.longitude)
+        u = self.mg.get_message(location=LOCATION)
+        self.assertEqual(LOCATION.longitude, u.message.location.longitude)
 
         u = self.mg.get_message(location=True)
         self.assertIsInstance(u.message.location, Location)
 
-        with self.assertRaisesRegexp(BadMessageException,
-                                     r"telegram\.Location"):
-            self.mg.get_message(location="location")
+        self.assertRaisesRegexp(
+            BadMessageException,
+            r"telegram\.Location",
+            self.mg.get_message,
+            location="location")
 
     def test_venue(self):
-        ven = Venue(Location(1.0, 1.0), "some place", "somewhere")
-        u = self.mg.get_message(venue=ven)
-        self.assertEqual(u.message.venue.title, ven.title)
+        u = self.mg.get_message(venue=VENUE)
+        self.assertEqual(u.message.venue.title, VENUE.title)
 
         u = self.mg.get_message(venue=True)
         self.assertIsInstance(u.message.venue, Venue)
 
-        with self.assertRaisesRegexp(BadMessageException, r"telegram\.Venue"):
-            self.mg.get_message(venue="Venue")
+        self.assertRaisesRegexp(
+            BadMessageException,
+            r"telegram\.Venue",
+            self.mg.get_message,
+            venue="Venue")
 
     def test_contact(self):
-        con = Contact("0612345", "testman")
-        u = self.mg.get_message(contact=con)
-        self.assertEqual(con.phone_number, u.message.contact.phone_number)
+        u = self.mg.get_message(contact=CONTACT)
+        self.assertEqual(CONTACT.phone_number, u.message.contact.phone_number)
 
         u = self.mg.get_message(contact=True)
         self.assertIsInstance(u.message.contact, Contact)
 
-        with self.assertRaisesRegexp(BadMessageException,
-                                     r"telegram\.Contact"):
-            self.mg.get_message(contact="contact")
-
-    def test_voice(self):
-        voice = Voice("idyouknow", 12)
-        u = self.mg.get_message(voice=voice)
-        self.assertEqual(voice.file_id, u.message.voice.file_id)
-
-        cap = "voice file"
-        u = self.mg.get_message(voice=voice, caption=cap)
-        self.assertEqual(u.message.caption, cap)
-
-        u = self.mg.get_message(voice=True)
-        self.assertIsInstance(u.message.voice, Voice)
-
-        with self.assertRaisesRegexp(BadMessageException, r"telegram\.Voice"):
-            self.mg.get_message(voice="voice")
-
-    def test_video(self):
-        video = Video("idyouknow", 200, 200, 10)
-        u = self.mg.get_message(video=video)
-        self.assertEqual(video.file_id, u.message.video.file_id)
-
-        cap = "video file"
-        u = self.mg.get_message(video=video, caption=cap)
-        self.assertEqual(u.message.caption, cap)
-
-        u = self.mg.get_message(video=True)
-        self.assertIsInstance(u.message.video, Video)
-
-        with self.assertRaisesRegexp(BadMessageException, r"telegram\.Video"):
-            self.mg.get_message(video="video")
-
-    def test_sticker(self):
-        sticker = Sticker("idyouknow", 30, 30)
-        u = self.mg.get_message(sticker=sticker)
-        self.assertEqual(sticker.file_id, u.message.sticker.file_id)
+        self.assertRaisesRegexp(
+            BadMessageException,
+            r"telegram\.Contact",
+            self.mg.get_message,
+            contact="contact")
 
-        cap = "sticker file"
-        u = self.mg.get_message(sticker=sticker, caption=cap)
-        self.assertEqual(u.message.caption, cap)
-
-        u = self.mg.get_message(sticker=True)
-        self.assertIsInstance(u.message.sticker, Sticker)
-
-        with self.assertRaisesRegexp(BadMessageException,
-                                     r"telegram\.Sticker"):
-            self.mg.get_message(sticker="sticker")
-
-    def test_document(self):
-        document = Document("idyouknow", file_name="test.pdf")
-        u = self.mg.get_message(document=document)
-        self.assertEqual(document.file_id, u.message.document.file_id)
+    def test_file_attachments(self):
+        for kw, sample, cls, error in FILE_ATTACHMENTS:
+            u = self.mg.get_message(**{kw: sample})
+            self.assertEqual(sample.file_id,
+                             getattr(u.message, kw).file_id, kw)
 
-        cap = "document file"
-        u = self.mg.get_message(document=document, caption=cap)
-        self.assertEqual(u.message.caption, cap)
-
-        u = self.mg.get_message(document=True)
-        self.assertIsInstance(u.message.document, Document)
+            cap = kw + " file"
+            u = self.mg.get_message(caption=cap, **{kw: sample})
+            self.assertEqual(u.message.caption, cap, kw)
 
-        with self.assertRaisesRegexp(BadMessageException,
-                                     r"telegram\.Document"):
-            self.mg.get_message(document="document")
+            u = self.mg.get_message(**{kw: True})
+            self.assertIsInstance(getattr(u.message, kw), cls, kw)
 
-    def test_audio(self):
-        audio = Audio("idyouknow", 23)
-        u = self.mg.get_message(audio=audio)
-        self.assertEqual(audio.file_id, u.message.audio.file_id)
-
-        cap = "audio file"
-        u = self.mg.get_message(audio=audio, caption=cap)
-        self.assertEqual(u.message.caption, cap)
-
-        u = self.mg.get_message(audio=True)
-        self.assertIsInstance(u.message.audio, Audio)
-
-        with self.assertRaisesRegexp(BadMessageException, r"telegram\.Audio"):
-            self.mg.get_message(audio="audio")
+            self.assertRaisesRegexp(BadMessageException, error,
+                                    self.mg.get_message, **{kw: kw})
 
     def test_photo(self):
-        photo = [PhotoSize("2", 1, 1, file_size=3)]
-        u = self.mg.get_message(photo=photo)
-        self.assertEqual(photo[0].file_size, u.message.photo[0].file_size)
+        u = self.mg.get_message(photo=PHOTO)
+        self.assertEqual(PHOTO[0].file_size, u.message.photo[0].file_size)
 
         cap = "photo file"
-        u = self.mg.get_message(photo=photo, caption=cap)
+        u = self.mg.get_message(photo=PHOTO, caption=cap)
         self.assertEqual(u.message.caption, cap)
 
         u = self.mg.get_message(photo=True)
         self.assertIsInstance(u.message.photo, list)
         self.assertIsInstance(u.message.photo[0], PhotoSize)
 
-        with self.assertRaisesRegexp(BadMessageException, r"telegram\.Photo"):
-            self.mg.get_message(photo="photo")
-        with self.assertRaisesRegexp(BadMessageException, r"telegram\.Photo"):
-            self.mg.get_message(photo=[1, 2, 3])
+        self.assertRaisesRegexp(
+            BadMessageException,
+            r"telegram\.Photo",
+            self.mg.get_message,
+            photo="photo")
+        self.assertRaisesRegexp(
+            BadMessageException,
+            r"telegram\.Photo",
+            self.mg.get_message,
+            photo=[1, 2, 3])
+
+
+class TestMessageGeneratorKinds(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.mg = MessageGenerator(bot=BOT)
+
+    def test_update(self):
+        for getter, attr in MESSAGE_KINDS:
+            u = getattr(self.mg, getter)()
+            self.assertIsInstance(u, Update, getter)
+            self.assertIsInstance(getattr(u, attr), Message, getter)
 
+    def test_with_parameters(self):
+        for getter, attr in MESSAGE_KINDS:
+            u = getattr(self.mg, getter)(text="New *text*",
+                                         parse_mode="Markdown")
+            self.assertEqual(getattr(u, attr).text, "New text", getter)
+            self.assertEqual(len(getattr(u, attr).entities), 1, getter)
 
-class TestMessageGeneratorEditedMessage(unittest.TestCase):
-    def setUp(self):
-        self.mg = MessageGenerator()
-
-    def test_edited_message(self):
-        u = self.mg.get_edited_message()
-        self.assertIsInstance(u.edited_message, Message)
-        self.assertIsInstance(u, Update)
 
-    def test_with_parameters(self):
-        u = self.mg.get_edited_message(
-            text="New *text*", parse_mode="Markdown")
-        self.assertEqual(u.edited_message.text, "New text")
-        self.assertEqual(len(u.edited_message.entities), 1)
+class TestMessageGeneratorEditedMessage(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.mg = MessageGenerator(bot=BOT)
 
     def test_with_message(self):
         m = self.mg.get_message(text="first").message
@@ -505,13 +524,16 @@ class TestMessageGeneratorEditedMessage(unittest.TestCase):
         self.assertEqual(m.from_user.id, u.edited_message.from_user.id)
         self.assertEqual(u.edited_message.text, "second")
 
-        with self.assertRaises(BadMessageException):
-            self.mg.get_edited_message(message="Message")
+        self.assertRaises(
+            BadMessageException, self.mg.get_edited_message, message="Message")
 
 
 class TestMessageGeneratorChannelPost(unittest.TestCase):
-    def setUp(self):
-        self.mg = MessageGenerator()
+    @classmethod
+    def setUpClass(cls):
+        cls.mg = MessageGenerator(bot=BOT)
+        cls.ug = UserGenerator()
+        cls.cg = ChatGenerator()
 
     def test_channel_post(self):
         u = self.mg.get_channel_post()
@@ -521,20 +543,24 @@ class TestMessageGeneratorChannelPost(unittest.TestCase):
         self.assertEqual(u.channel_post.from_user, None)
 
     def test_with_chat(self):
-        cg = ChatGenerator()
-        group = cg.get_chat(type="group")
-        channel = cg.get_chat(type="channel")
+        group = self.cg.get_chat(type="group")
+        channel = self.cg.get_chat(type="channel")
         u = self.mg.get_channel_post(chat=channel)
         self.assertEqual(channel.title, u.channel_post.chat.title)
 
-        with self.assertRaisesRegexp(BadChatException, "telegram\.Chat"):
-            self.mg.get_channel_post(chat="chat")
-        with self.assertRaisesRegexp(BadChatException, "chat\.type"):
-            self.mg.get_channel_post(chat=group)
+        self.assertRaisesRegexp(
+            BadChatException,
+            "telegram\.Chat",
+            self.mg.get_channel_post,
+            chat="chat")
+        self.assertRaisesRegexp(
+            BadChatException,
+            "chat\.type",
+            self.mg.get_channel_post,
+            chat=group)
 
     def test_with_user(self):
-        ug = UserGenerator()
-        user = ug.get_user()
+        user = self.ug.get_user()
         u = self.mg.get_channel_post(user=user)
         self.assertEqual(u.channel_post.from_user.id, user.id)
 
@@ -546,19 +572,9 @@ class TestMessageGeneratorChannelPost(unittest.TestCase):
 
 
 class TestMessageGeneratorEditedChannelPost(unittest.TestCase):
-    def setUp(self):
-        self.mg = MessageGenerator()
-
-    def test_edited_channel_post(self):
-        u = self.mg.get_edited_channel_post()
-        self.assertIsInstance(u.edited_channel_post, Message)
-        self.assertIsInstance(u, Update)
-
-    def test_with_parameters(self):
-        u = self.mg.get_edited_channel_post(
-            text="New *text*", parse_mode="Markdown")
-        self.assertEqual(u.edited_channel_post.text, "New text")
-        self.assertEqual(len(u.edited_channel_post.entities), 1)
+    @classmethod
+    def setUpClass(cls):
+        cls.mg = MessageGenerator(bot=BOT)
 
     def test_with_channel_post(self):
         m = self.mg.get_channel_post(text="first").channel_post
@@ -567,8 +583,10 @@ class TestMessageGeneratorEditedChannelPost(unittest.TestCase):
         self.assertEqual(m.chat.id, u.edited_channel_post.chat.id)
         self.assertEqual(u.edited_channel_post.text, "second")
 
-        with self.assertRaises(BadMessageException):
-            self.mg.get_edited_channel_post(channel_post="Message")
+        self.assertRaises(
+            BadMessageException,
+            self.mg.get_edited_channel_post,
+            channel_post="Message")
 
 
 if __name__ == '__main__':
@@ -20,10 +20,10 @@
 # along with this program.  If not, see [http://www.gnu.org/licenses/].
 from __future__ import absolute_import
 
+import json
 import unittest
 
-import telegram
-from telegram import ChatAction
+from telegram import ChatAction, ParseMode
 from telegram import InlineKeyboardMarkup, InlineKeyboardButton
 from telegram import InlineQueryResult
 from telegram import TelegramError
@@ -32,10 +32,99 @@ from telegram.ext import Updater, CommandHandler
 
 from ptbtest import Mockbot
 
+# name of a Mockbot built with the default username
+NAME = "@MockBot"
+
+# PEP8 aliases Mockbot offers next to the camelCase methods tested below
+SNAKE_CASE_ALIASES = [
+    "get_me", "send_message", "forward_message", "send_photo", "send_audio",
+    "send_document", "send_sticker", "send_video", "send_voice",
+    "send_location", "send_venue", "send_contact", "send_game",
+    "send_chat_action", "answer_inline_query", "get_user_profile_photos",
+    "get_file", "kick_chat_member", "unban_chat_member",
+    "answer_callback_query", "edit_message_text", "edit_message_caption",
+    "edit_message_reply_markup", "get_updates", "set_webhook", "leave_chat",
+    "get_chat", "get_chat_administrators", "get_chat_member",
+    "get_chat_members_count", "set_game_score", "get_game_high_scores"
+]
+
+# Mockbot only serializes reply markup, so tests can share this one.
+KEYBOARD = InlineKeyboardMarkup(
+    [[InlineKeyboardButton(
+        "test 1", callback_data="test1")],
+     [InlineKeyboardButton(
+         "test 2", callback_data="test2")]])
+
+# (method, args, kwargs, expected fields) of calls Mockbot only records
+CALLS = [
+    ("answerCallbackQuery", (1, "done"), dict(
+        show_alert=True, url="google.com", cache_time=2), dict(text="done")),
+    ("forwardMessage", (1, 2, 3), {}, dict(chat_id=1)),
+    ("getChat", (1, ), {}, dict(chat_id=1)),
+    ("getChatAdministrators", (), dict(chat_id=2), dict(chat_id=2)),
+    ("getChatMember", (1, 3), {}, dict(
+        chat_id=1, user_id=3)),
+    ("getChatMembersCount", (1, ), {}, dict(chat_id=1)),
+    ("getFile", ("12345", ), {}, dict(file_id="12345")),
+    ("getGameHighScores", (1, ), dict(
+        chat_id=2, message_id=3, inline_message_id=4), dict(user_id=1)),
+    ("getUserProfilePhotos", (1, ), dict(offset=2), dict(user_id=1)),
+    ("kickChatMember", (), dict(
+        chat_id=1, user_id=2), dict(user_id=2)),
+    ("leaveChat", (1, ), {}, {}),
+    ("sendAudio", (1, "123"), dict(
+        duration=2, performer="singer", title="song", caption="this song"),
+     dict(
+         chat_id=1,
+         duration=2,
+         performer="singer",
+         title="song",
+         caption="this song")),
+    ("sendChatAction", (1, ChatAction.TYPING), {}, dict(
+        chat_id=1, action="typing")),
+    ("sendContact", (1, "123456", "test"), dict(last_name="me"), dict(
+        chat_id=1, phone_number="123456", last_name="me")),
+    ("sendDocument", (1, "45"), dict(
+        filename="jaja.docx", caption="good doc"), dict(
+            chat_id=1, filename="jaja.docx", caption="good doc")),
+    ("sendGame", (1, "testgame"), {}, dict(
+        chat_id=1, game_short_name="testgame")),
+    ("sendLocation", (1, 52.123, 4.23), {}, dict(chat_id=1)),
+    ("sendPhoto", (1, "test.png"), dict(caption="photo"), dict(
+        chat_id=1, caption="photo")),
+    ("sendSticker", (-4231, "test"), {}, dict(chat_id=-4231)),
+    ("sendVenue", (1, 4.2, 5.1, "nice place", "somewherestreet 2"),
+     dict(foursquare_id=2), dict(
+         chat_id=1, foursquare_id=2)),
+    ("sendVideo", (1, "some file"), dict(
+        duration=3, caption="video"), dict(
+            chat_id=1, duration=3, caption="video")),
+    ("sendVoice", (1, "some file"), dict(
+        duration=3, caption="voice"), dict(
+            chat_id=1, duration=3, caption="voice")),
+    ("unbanChatMember", (1, 2), {}, dict(chat_id=1)),
+]
+
+# edit arguments that name neither a chat message nor an inline message
+INCOMPLETE_TARGETS = [{}, {"chat_id": 12}, {"message_id": 12}]
+
+
+def camel_case(name):
+    first, rest = name.split("_", 1)
+    return first + "".join(word.title() for word in rest.split("_"))
+
 
 class TestMockbot(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.mockbot = Mockbot()
+
     def setUp(self):
-        self.mockbot = Mockbot()
+        # emptied in place, the list the shared bot appends to is reused
+        del self.mockbot.sent_messages[:]
+
+    def last_sent(self):
+        return self.mockbot.sent_messages[-1]
 
     def test_updater_works_with_mockbot(self):
         # handler method
@@ -47,6 +136,8 @@ class TestMockbot(unittest.TestCase):
         dp = updater.dispatcher
         dp.add_handler(CommandHandler("start", start))
         updater.start_polling()
+        # the shared mockbot outlives this test, so its poller must stop even on failure
+        self.addCleanup(updater.stop)
         user = User(id=1, first_name="test")
         chat = Chat(45, "group")
         message = Message(
@@ -66,13 +157,12 @@ class TestMockbot(unittest.TestCase):
         data = data[0]
         self.assertEqual(data['method'], 'sendMessage')
         self.assertEqual(data['chat_id'], chat.id)
-        updater.stop()
 
     def test_properties(self):
         self.assertEqual(self.mockbot.id, 0)
         self.assertEqual(self.mockbot.first_name, "Mockbot")
         self.assertEqual(self.mockbot.last_name, "Bot")
-        self.assertEqual(self.mockbot.name, "@MockBot")
+        self.assertEqual(self.mockbot.name, NAME)
         mb2 = Mockbot("OtherUsername")
         self.assertEqual(mb2.name, "@OtherUsername")
         self.mockbot.sendMessage(1, "test 1")
@@ -81,21 +171,26 @@ class TestMockbot(unittest.TestCase):
         self.mockbot.reset()
         self.assertEqual(len(self.mockbot.sent_messages), 0)
 
+    def test_snake_case_aliases(self):
+        methods = vars(Mockbot)
+        for alias in SNAKE_CASE_ALIASES:
+            self.assertIs(methods[alias], methods[camel_case(alias)], alias)
+
     def test_dejson_and_to_dict(self):
-        import json
         d = self.mockbot.to_dict()
         self.assertIsInstance(d, dict)
         js = json.loads(json.dumps(d))
         b = Mockbot.de_json(js, None)
         self.assertIsInstance(b, Mockbot)
 
-    def test_answerCallbackQuery(self):
-        self.mockbot.answerCallbackQuery(
-            1, "done", show_alert=True, url="google.com", cache_time=2)
+    def test_calls(self):
+        for method, args, kwargs, expected in CALLS:
+            getattr(self.mockbot, method)(*args, **kwargs)
+            data = self.last_sent()
 
-        data = self.mockbot.sent_messages[-1]
-        self.assertEqual(data['method'], "answerCallbackQuery")
-        self.assertEqual(data['text'], "done")
+            self.assertEqual(data['method'], method, method)
+            for key, value in expected.items():
+                self.assertEqual(data[key], value, method)
 
     def test_answerInlineQuery(self):
         r = [
@@ -109,46 +204,40 @@ class TestMockbot(unittest.TestCase):
             switch_pm_parameter="asd",
             switch_pm_text="pm")
 
-        data = self.mockbot.sent_messages[-1]
+        data = self.last_sent()
         self.assertEqual(data['method'], "answerInlineQuery")
         self.assertEqual(data['results'][0]['id'], "1")
 
     def test_editMessageCaption(self):
         self.mockbot.editMessageCaption(chat_id=12, message_id=23)
 
-        data = self.mockbot.sent_messages[-1]
+        data = self.last_sent()
         self.assertEqual(data['method'], "editMessageCaption")
         self.assertEqual(data['chat_id'], 12)
         self.mockbot.editMessageCaption(
             inline_message_id=23, caption="new cap", photo=True)
-        data = self.mockbot.sent_messages[-1]
+        data = self.last_sent()
         self.assertEqual(data['method'], "editMessageCaption")
-        with self.assertRaises(TelegramError):
-            self.mockbot.editMessageCaption()
-        with self.assertRaises(TelegramError):
-            self.mockbot.editMessageCaption(chat_id=12)
-        with self.assertRaises(TelegramError):
-            self.mockbot.editMessageCaption(message_id=12)
+        for kwargs in INCOMPLETE_TARGETS:
+            self.assertRaises(TelegramError, self.mockbot.editMessageCaption,
+                              **kwargs)
 
     def test_editMessageReplyMarkup(self):
         self.mockbot.editMessageReplyMarkup(chat_id=1, message_id=1)
-        data = self.mockbot.sent_messages[-1]
+        data = self.last_sent()
         self.assertEqual(data['method'], "editMessageReplyMarkup")
         self.assertEqual(data['chat_id'], 1)
         self.mockbot.editMessageReplyMarkup(inline_message_id=1)
-        data = self.mockbot.sent_messages[-1]
+        data = self.last_sent()
         self.assertEqual(data['method'], "editMessageReplyMarkup")
         self.assertEqual(data['inline_message_id'], 1)
-        with self.assertRaises(TelegramError):
-            self.mockbot.editMessageReplyMarkup()
-        with self.assertRaises(TelegramError):
-            self.mockbot.editMessageReplyMarkup(chat_id=12)
-        with self.assertRaises(TelegramError):
-            self.mockbot.editMessageReplyMarkup(message_id=12)
+        for kwargs in INCOMPLETE_TARGETS:
+            self.assertRaises(TelegramError,
+                              self.mockbot.editMessageReplyMarkup, **kwargs)
 
     def test_editMessageText(self):
         self.mockbot.editMessageText("test", chat_id=1, message_id=1)
-        data = self.mockbot.sent_messages[-1]
+        data = self.last_sent()
         self.assertEqual(data['method'], "editMessageText")
         self.assertEqual(data['chat_id'], 1)
         self.assertEqual(data['text'], "test")
@@ -157,216 +246,39 @@ class TestMockbot(unittest.TestCase):
             inline_message_id=1,
             parse_mode="Markdown",
             disable_web_page_preview=True)
-        data = self.mockbot.sent_messages[-1]
+        data = self.last_sent()
         self.assertEqual(data['method'], "editMessageText")
         self.assertEqual(data['inline_message_id'], 1)
 
-    def test_forwardMessage(self):
-        self.mockbot.forwardMessage(1, 2, 3)
-        data = self.mockbot.sent_messages[-1]
-
-        self.assertEqual(data['method'], "forwardMessage")
-        self.assertEqual(data['chat_id'], 1)
-
-    def test_getChat(self):
-        self.mockbot.getChat(1)
-        data = self.mockbot.sent_messages[-1]
-
-        self.assertEqual(data['method'], "getChat")
-        self.assertEqual(data['chat_id'], 1)
-
-    def test_getChatAdministrators(self):
-        self.mockbot.getChatAdministrators(chat_id=2)
-        data = self.mockbot.sent_messages[-1]
-
-        self.assertEqual(data['method'], "getChatAdministrators")
-        self.assertEqual(data['chat_id'], 2)
-
-    def test_getChatMember(self):
-        self.mockbot.getChatMember(1, 3)
-        data = self.mockbot.sent_messages[-1]
-
-        self.assertEqual(data['method'], "getChatMember")
-        self.assertEqual(data['chat_id'], 1)
-        self.assertEqual(data['user_id'], 3)
-
-    def test_getChatMembersCount(self):
-        self.mockbot.getChatMembersCount(1)
-        data = self.mockbot.sent_messages[-1]
-
-        self.assertEqual(data['method'], "getChatMembersCount")
-        self.assertEqual(data['chat_id'], 1)
-
-    def test_getFile(self):
-        self.mockbot.getFile("12345")
-        data = self.mockbot.sent_messages[-1]
-
-        self.assertEqual(data['method'], "getFile")
-        self.assertEqual(data['file_id'], "12345")
-
-    def test_getGameHighScores(self):
-        self.mockbot.getGameHighScores(
-            1, chat_id=2, message_id=3, inline_message_id=4)
-        data = self.mockbot.sent_messages[-1]
-
-        self.assertEqual(data['method'], "getGameHighScores")
-        self.assertEqual(data['user_id'], 1)
-
     def test_getMe(self):
         data = self.mockbot.getMe()
 
-        self.assertIsInstance(data, User)
-        self.assertEqual(data.name, "@MockBot")
+        self.assertIs(type(data), User)
+        self.assertEqual(data.name, NAME)
 
     def test_getUpdates(self):
         data = self.mockbot.getUpdates()
 
         self.assertEqual(data, [])
 
-    def test_getUserProfilePhotos(self):
-        self.mockbot.getUserProfilePhotos(1, offset=2)
-        data = self.mockbot.sent_messages[-1]
-
-        self.assertEqual(data['method'], "getUserProfilePhotos")
-        self.assertEqual(data['user_id'], 1)
-
-    def test_kickChatMember(self):
-        self.mockbot.kickChatMember(chat_id=1, user_id=2)
-        data = self.mockbot.sent_messages[-1]
-
-        self.assertEqual(data['method'], "kickChatMember")
-        self.assertEqual(data['user_id'], 2)
-
-    def test_leaveChat(self):
-        self.mockbot.leaveChat(1)
-        data = self.mockbot.sent_messages[-1]
-
-        self.assertEqual(data['method'], "leaveChat")
-
-    def test_sendAudio(self):
-        self.mockbot.sendAudio(
-            1,
-            "123",
-            duration=2,
-            performer="singer",
-            title="song",
-            caption="this song")
-        data = self.mockbot.sent_messages[-1]
-
-        self.assertEqual(data['method'], "sendAudio")
-        self.assertEqual(data['chat_id'], 1)
-        self.assertEqual(data['duration'], 2)
-        self.assertEqual(data['performer'], "singer")
-        self.assertEqual(data['title'], "song")
-        self.assertEqual(data['caption'], "this song")
-
-    def test_sendChatAction(self):
-        self.mockbot.sendChatAction(1, ChatAction.TYPING)
-        data = self.mockbot.sent_messages[-1]
-
-        self.assertEqual(data['method'], "sendChatAction")
-        self.assertEqual(data['chat_id'], 1)
-        self.assertEqual(data['action'], "typing")
-
-    def test_sendContact(self):
-        self.mockbot.sendContact(1, "123456", "test", last_name="me")
-        data = self.mockbot.sent_messages[-1]
-
-        self.assertEqual(data['method'], "sendContact")
-        self.assertEqual(data['chat_id'], 1)
-        self.assertEqual(data['phone_number'], "123456")
-        self.assertEqual(data['last_name'], "me")
-
-    def test_sendDocument(self):
-        self.mockbot.sendDocument(
-            1, "45", filename="jaja.docx", caption="good doc")
-        data = self.mockbot.sent_messages[-1]
-
-        self.assertEqual(data['method'], "sendDocument")
-        self.assertEqual(data['chat_id'], 1)
-        self.assertEqual(data['filename'], "jaja.docx")
-        self.assertEqual(data['caption'], "good doc")
-
-    def test_sendGame(self):
-        self.mockbot.sendGame(1, "testgame")
-        data = self.mockbot.sent_messages[-1]
-
-        self.assertEqual(data['method'], "sendGame")
-        self.assertEqual(data['chat_id'], 1)
-        self.assertEqual(data['game_short_name'], "testgame")
-
-    def test_sendLocation(self):
-        self.mockbot.sendLocation(1, 52.123, 4.23)
-        data = self.mockbot.sent_messages[-1]
-
-        self.assertEqual(data['method'], "sendLocation")
-        self.assertEqual(data['chat_id'], 1)
-
     def test_sendMessage(self):
-        keyb = InlineKeyboardMarkup(
-            [[InlineKeyboardButton(
-                "test 1", callback_data="test1")],
-             [InlineKeyboardButton(
-                 "test 2", callback_data="test2")]])
         self.mockbot.sendMessage(
             1,
             "test",
-            parse_mode=telegram.ParseMode.MARKDOWN,
-            reply_markup=keyb,
+            parse_mode=ParseMode.MARKDOWN,
+            reply_markup=KEYBOARD,
             disable_notification=True,
             reply_to_message_id=334,
             disable_web_page_preview=True)
-        data = self.mockbot.sent_messages[-1]
+        data = self.last_sent()
 
         self.assertEqual(data['method'], "sendMessage")
         self.assertEqual(data['chat_id'], 1)
         self.assertEqual(data['text'], "test")
         self.assertEqual(
-            eval(data['reply_markup'])['inline_keyboard'][1][0][
+            json.loads(data['reply_markup'])['inline_keyboard'][1][0][
                 'callback_data'], "test2")
 
-    def test_sendPhoto(self):
-        self.mockbot.sendPhoto(1, "test.png", caption="photo")
-        data = self.mockbot.sent_messages[-1]
-
-        self.assertEqual(data['method'], "sendPhoto")
-        self.assertEqual(data['chat_id'], 1)
-        self.assertEqual(data['caption'], "photo")
-
-    def test_sendSticker(self):
-        self.mockbot.sendSticker(-4231, "test")
-        data = self.mockbot.sent_messages[-1]
-
-        self.assertEqual(data['method'], "sendSticker")
-        self.assertEqual(data['chat_id'], -4231)
-
-    def test_sendVenue(self):
-        self.mockbot.sendVenue(
-            1, 4.2, 5.1, "nice place", "somewherestreet 2", foursquare_id=2)
-        data = self.mockbot.sent_messages[-1]
-
-        self.assertEqual(data['method'], "sendVenue")
-        self.assertEqual(data['chat_id'], 1)
-        self.assertEqual(data['foursquare_id'], 2)
-
-    def test_sendVideo(self):
-        self.mockbot.sendVideo(1, "some file", duration=3, caption="video")
-        data = self.mockbot.sent_messages[-1]
-
-        self.assertEqual(data['method'], "sendVideo")
-        self.assertEqual(data['chat_id'], 1)
-        self.assertEqual(data['duration'], 3)
-        self.assertEqual(data['caption'], "video")
-
-    def test_sendVoice(self):
-        self.mockbot.sendVoice(1, "some file", duration=3, caption="voice")
-        data = self.mockbot.sent_messages[-1]
-
-        self.assertEqual(data['method'], "sendVoice")
-        self.assertEqual(data['chat_id'], 1)
-        self.assertEqual(data['duration'], 3)
-        self.assertEqual(data['caption'], "voice")
-
     def test_setGameScore(self):
         self.mockbot.setGameScore(
             1,
@@ -376,19 +288,12 @@ class TestMockbot(unittest.TestCase):
             inline_message_id=4,
             force=True,
             disable_edit_message=True)
-        data = self.mockbot.sent_messages[-1]
+        data = self.last_sent()
 
         self.assertEqual(data['method'], "setGameScore")
         self.assertEqual(data['user_id'], 1)
         self.mockbot.setGameScore(1, 200, edit_message=True)
 
-    def test_unbanChatMember(self):
-        self.mockbot.unbanChatMember(1, 2)
-        data = self.mockbot.sent_messages[-1]
-
-        self.assertEqual(data['method'], "unbanChatMember")
-        self.assertEqual(data['chat_id'], 1)
-
 
 if __name__ == '__main__':
     unittest.main()
@@ -25,8 +25,9 @@ from ptbtest import UserGenerator
 
 
 class TestUserGenerator(unittest.TestCase):
-    def setUp(self):
-        self.ug = UserGenerator()
+    @classmethod
+    def setUpClass(cls):
+        cls.ug = UserGenerator()
 
     def test_no_specification(self):
         u = self.ug.get_user()